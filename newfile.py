@@ -6,7 +6,7 @@ import json
 import threading
 import time
 import re
-from datetime import datetime
+from datetime import datetime, timedelta
 import numpy as np
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.metrics.pairwise import cosine_similarity
@@ -83,7 +83,7 @@ class DiscoveryAIBrain:
             self.conversation_history.pop(0)
     
     def generate_response(self, user_input, user_id="default"):
-        """Generate AI response"""
+        """Generate AI response, returned along with the intent that produced it"""
         processed_input = self.preprocess_text(user_input)
         
         # Check for exact matches in knowledge base
@@ -93,22 +93,22 @@ class DiscoveryAIBrain:
                     if category == "greeting":
                         return random.choice(["Hello! How can I help you explore today? 🌟", 
                                             "Hi there! Ready to discover something new? 🚀",
-                                            "Greetings! What would you like to know?"])
+                                            "Greetings! What would you like to know?"]), category
                     elif category == "farewell":
                         return random.choice(["Goodbye! Looking forward to our next exploration! 👋",
                                             "See you later! Keep discovering! 🌈",
-                                            "Take care! Come back with more questions! 💫"])
+                                            "Take care! Come back with more questions! 💫"]), category
                     elif category == "identity":
-                        return "I'm Discovery AI March - an advanced neural network designed to help you explore and learn about the world through intelligent conversations and web search! 🤖"
+                        return "I'm Discovery AI March - an advanced neural network designed to help you explore and learn about the world through intelligent conversations and web search! 🤖", category
                     elif category == "capabilities":
-                        return "I can search the web for latest information, have intelligent conversations, learn from interactions, and provide personalized responses while keeping your data secure! 🔍"
+                        return "I can search the web for latest information, have intelligent conversations, learn from interactions, and provide personalized responses while keeping your data secure! 🔍", category
         
         # For other queries, perform web search
         search_results = self.web_search(user_input)
         if search_results:
-            return f"🔍 Based on my search, I found this information:\n\n{search_results}\n\nWould you like to know more about any specific aspect?"
+            return f"🔍 Based on my search, I found this information:\n\n{search_results}\n\nWould you like to know more about any specific aspect?", "web_search"
         else:
-            return "I'm constantly learning! Could you rephrase your question or ask about something else? I'd be happy to search for more specific information. 🌐"
+            return "I'm constantly learning! Could you rephrase your question or ask about something else? I'd be happy to search for more specific information. 🌐", "web_search"
     
     def web_search(self, query):
         """Perform web search using Google Custom Search"""
@@ -147,6 +147,17 @@ class DiscoveryAIBrain:
             return f"Search completed. Here's what I can share based on available information."
 
 class DatabaseManager:
+    # Upper bound in seconds (exclusive) and label for each response latency bucket
+    LATENCY_BUCKETS = [
+        (1, "<1s"),
+        (3, "1-3s"),
+        (10, "3-10s"),
+        (float('inf'), "10s+"),
+    ]
+    
+    # Hourly rollup buckets older than this are pruned; daily buckets are kept
+    HOUR_RETENTION_DAYS = 7
+    
     def __init__(self):
         self.init_database()
     
@@ -178,6 +189,96 @@ class DatabaseManager:
                 )
             ''')
             
+            # Create analytics rollup tables (maintained incrementally on insert)
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'usage_rollups'")
+            backfill_usage = cursor.fetchone() is None
+            
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS usage_rollups (
+                    user_id TEXT NOT NULL,
+                    granularity TEXT NOT NULL,
+                    bucket_start TEXT NOT NULL,
+                    message_count INTEGER DEFAULT 0,
+                    PRIMARY KEY (user_id, granularity, bucket_start)
+                )
+            ''')
+            
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_usage_rollups_bucket
+                ON usage_rollups (granularity, bucket_start)
+            ''')
+            
+            # All-users rollups, so ops charts and totals are point/range reads.
+            # Besides 'hour' and 'day' buckets it holds two running counters
+            # under an empty bucket_start: 'total' messages and 'users' seen.
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'global_usage_rollups'")
+            backfill_global = cursor.fetchone() is None
+            
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS global_usage_rollups (
+                    granularity TEXT NOT NULL,
+                    bucket_start TEXT NOT NULL,
+                    message_count INTEGER DEFAULT 0,
+                    PRIMARY KEY (granularity, bucket_start)
+                )
+            ''')
+            
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS intent_rollups (
+                    intent TEXT PRIMARY KEY,
+                    message_count INTEGER DEFAULT 0
+                )
+            ''')
+            
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS latency_rollups (
+                    bucket TEXT PRIMARY KEY,
+                    message_count INTEGER DEFAULT 0
+                )
+            ''')
+            
+            # One-time backfill of message counts for conversations saved before
+            # the rollups existed. Intent and latency were never stored for those
+            # rows, so intent_rollups and latency_rollups start at zero.
+            if backfill_usage:
+                cursor.execute('''
+                    INSERT INTO usage_rollups (user_id, granularity, bucket_start, message_count)
+                    SELECT user_id, 'hour', substr(timestamp, 1, 13) || ':00', COUNT(*)
+                    FROM conversations
+                    GROUP BY user_id, substr(timestamp, 1, 13)
+                ''')
+                cursor.execute('''
+                    INSERT INTO usage_rollups (user_id, granularity, bucket_start, message_count)
+                    SELECT user_id, 'day', substr(timestamp, 1, 10), COUNT(*)
+                    FROM conversations
+                    GROUP BY user_id, substr(timestamp, 1, 10)
+                ''')
+            
+            # Per-user 'total' rows and the all-users rollups are derived from
+            # the per-user day/hour rows the first time they are needed.
+            if backfill_global:
+                cursor.execute('''
+                    INSERT OR IGNORE INTO usage_rollups (user_id, granularity, bucket_start, message_count)
+                    SELECT user_id, 'total', '', SUM(message_count)
+                    FROM usage_rollups
+                    WHERE granularity = 'day'
+                    GROUP BY user_id
+                ''')
+                cursor.execute('''
+                    INSERT INTO global_usage_rollups (granularity, bucket_start, message_count)
+                    SELECT granularity, bucket_start, SUM(message_count)
+                    FROM usage_rollups
+                    WHERE granularity IN ('hour', 'day', 'total')
+                    GROUP BY granularity, bucket_start
+                ''')
+                cursor.execute('''
+                    INSERT INTO global_usage_rollups (granularity, bucket_start, message_count)
+                    SELECT 'users', '', COUNT(*)
+                    FROM usage_rollups
+                    WHERE granularity = 'total'
+                ''')
+                self.prune_hour_rollups(cursor, datetime.now())
+            
             conn.commit()
             conn.close()
             print("Database initialized successfully")
@@ -185,22 +286,43 @@ class DatabaseManager:
         except Exception as e:
             print(f"Database initialization error: {e}")
     
-    def save_conversation(self, user_input, ai_response, user_id="default"):
-        """Save conversation to database"""
+    def save_conversation(self, user_input, ai_response, user_id="default", intent=None, latency=None):
+        """Save conversation to database
+        
+        The conversation row is committed before the rollups are touched, so
+        a rollup failure can only skip this message's analytics, never the
+        message itself.
+        """
+        conn = None
         try:
             conn = sqlite3.connect('discovery_ai.db')
             cursor = conn.cursor()
+            now = datetime.now()
             
             cursor.execute('''
                 INSERT INTO conversations (timestamp, user_input, ai_response, user_id)
                 VALUES (?, ?, ?, ?)
-            ''', (datetime.now().isoformat(), user_input, ai_response, user_id))
+            ''', (now.isoformat(), user_input, ai_response, user_id))
             
             conn.commit()
-            conn.close()
             
         except Exception as e:
             print(f"Error saving conversation: {e}")
+            if conn is not None:
+                conn.close()
+            return
+        
+        # Keep analytics rollups in step with the insert
+        try:
+            self.update_rollups(cursor, now, user_id, intent, latency)
+            conn.commit()
+            
+        except Exception as e:
+            conn.rollback()
+            print(f"Error updating analytics rollups: {e}")
+        
+        finally:
+            conn.close()
     
     def get_conversation_history(self, user_id="default", limit=50):
         """Get conversation history from database"""
@@ -224,6 +346,169 @@ class DatabaseManager:
         except Exception as e:
             print(f"Error getting conversation history: {e}")
             return []
+    
+    def latency_bucket(self, latency):
+        """Map a response latency in seconds to its rollup bucket"""
+        for upper, label in self.LATENCY_BUCKETS:
+            if latency < upper:
+                return label
+        return self.LATENCY_BUCKETS[-1][1]
+    
+    def update_rollups(self, cursor, timestamp, user_id="default", intent=None, latency=None):
+        """Increment analytics rollups for one saved message.
+        
+        Takes the caller's cursor and leaves committing to the caller; batch
+        writers should call this once per row after committing the rows.
+        """
+        hour_bucket = timestamp.strftime('%Y-%m-%dT%H:00')
+        buckets = [
+            ("hour", hour_bucket),
+            ("day", timestamp.strftime('%Y-%m-%d')),
+            ("total", ""),
+        ]
+        for granularity, bucket_start in buckets:
+            self.increment_rollup(cursor, 'usage_rollups',
+                                  {"user_id": user_id, "granularity": granularity, "bucket_start": bucket_start})
+            self.increment_rollup(cursor, 'global_usage_rollups',
+                                  {"granularity": granularity, "bucket_start": bucket_start})
+        
+        # A per-user total of 1 means this is the user's first message
+        cursor.execute("SELECT message_count FROM usage_rollups WHERE user_id = ? AND granularity = 'total' AND bucket_start = ''",
+                       (user_id,))
+        if cursor.fetchone()[0] == 1:
+            self.increment_rollup(cursor, 'global_usage_rollups', {"granularity": "users", "bucket_start": ""})
+        
+        if intent is not None:
+            self.increment_rollup(cursor, 'intent_rollups', {"intent": intent})
+        
+        if latency is not None:
+            self.increment_rollup(cursor, 'latency_rollups', {"bucket": self.latency_bucket(latency)})
+        
+        # Prune once per hour, when the first message of a new hour arrives
+        cursor.execute("SELECT message_count FROM global_usage_rollups WHERE granularity = 'hour' AND bucket_start = ?",
+                       (hour_bucket,))
+        if cursor.fetchone()[0] == 1:
+            self.prune_hour_rollups(cursor, timestamp)
+    
+    def prune_hour_rollups(self, cursor, now):
+        """Delete hourly rollup buckets older than HOUR_RETENTION_DAYS"""
+        cutoff = (now - timedelta(days=self.HOUR_RETENTION_DAYS)).strftime('%Y-%m-%dT%H:00')
+        cursor.execute("DELETE FROM usage_rollups WHERE granularity = 'hour' AND bucket_start < ?", (cutoff,))
+        cursor.execute("DELETE FROM global_usage_rollups WHERE granularity = 'hour' AND bucket_start < ?", (cutoff,))
+    
+    def increment_rollup(self, cursor, table, key):
+        """Add one to message_count of a rollup row, creating it if needed.
+        
+        Uses INSERT OR IGNORE + UPDATE rather than ON CONFLICT upserts so it
+        also works on SQLite older than 3.24.
+        """
+        columns = ', '.join(key)
+        placeholders = ', '.join('?' for _ in key)
+        conditions = ' AND '.join(f"{column} = ?" for column in key)
+        values = tuple(key.values())
+        
+        cursor.execute(f'INSERT OR IGNORE INTO {table} ({columns}, message_count) VALUES ({placeholders}, 0)', values)
+        cursor.execute(f'UPDATE {table} SET message_count = message_count + 1 WHERE {conditions}', values)
+    
+    def get_usage_stats(self, granularity="hour", user_id=None, limit=24):
+        """Get message counts for the last `limit` hour/day buckets up to now
+        
+        Buckets without messages are filled with 0, so the result is always a
+        continuous range of `limit` (bucket_start, count) pairs, oldest first.
+        """
+        now = datetime.now()
+        if granularity == "hour":
+            end = now.replace(minute=0, second=0, microsecond=0)
+            keys = [(end - timedelta(hours=i)).strftime('%Y-%m-%dT%H:00') for i in range(limit - 1, -1, -1)]
+        else:
+            keys = [(now - timedelta(days=i)).strftime('%Y-%m-%d') for i in range(limit - 1, -1, -1)]
+        
+        counts = {}
+        try:
+            conn = sqlite3.connect('discovery_ai.db')
+            cursor = conn.cursor()
+            
+            if user_id is None:
+                cursor.execute('''
+                    SELECT bucket_start, message_count
+                    FROM global_usage_rollups
+                    WHERE granularity = ? AND bucket_start BETWEEN ? AND ?
+                ''', (granularity, keys[0], keys[-1]))
+            else:
+                cursor.execute('''
+                    SELECT bucket_start, message_count
+                    FROM usage_rollups
+                    WHERE user_id = ? AND granularity = ? AND bucket_start BETWEEN ? AND ?
+                ''', (user_id, granularity, keys[0], keys[-1]))
+            
+            counts = dict(cursor.fetchall())
+            conn.close()
+            
+        except Exception as e:
+            print(f"Error getting usage stats: {e}")
+        
+        return [(key, counts.get(key, 0)) for key in keys]
+    
+    def get_user_message_count(self, user_id):
+        """Get total and today's message counts for one user from the usage rollups"""
+        try:
+            conn = sqlite3.connect('discovery_ai.db')
+            cursor = conn.cursor()
+            
+            cursor.execute('''
+                SELECT granularity, message_count
+                FROM usage_rollups
+                WHERE user_id = ? AND ((granularity = 'total' AND bucket_start = '')
+                                       OR (granularity = 'day' AND bucket_start = ?))
+            ''', (user_id, datetime.now().strftime('%Y-%m-%d')))
+            
+            counts = dict(cursor.fetchall())
+            conn.close()
+            
+            return {"total_messages": counts.get("total", 0), "today_messages": counts.get("day", 0)}
+            
+        except Exception as e:
+            print(f"Error getting user message count: {e}")
+            return {"total_messages": 0, "today_messages": 0}
+    
+    def get_analytics_summary(self):
+        """Get totals, intent counts and latency buckets from the rollups
+        
+        Message totals include backfilled history, but intent and latency were
+        only recorded once analytics were enabled, so they may sum to less.
+        """
+        summary = {"total_messages": 0, "active_users": 0, "intents": {},
+                   "intent_count": 0, "web_search_count": 0, "latency": {}}
+        try:
+            conn = sqlite3.connect('discovery_ai.db')
+            cursor = conn.cursor()
+            
+            cursor.execute('''
+                SELECT granularity, message_count
+                FROM global_usage_rollups
+                WHERE granularity IN ('total', 'users') AND bucket_start = ''
+            ''')
+            counters = dict(cursor.fetchall())
+            summary["total_messages"] = counters.get("total", 0)
+            summary["active_users"] = counters.get("users", 0)
+            
+            cursor.execute('SELECT intent, message_count FROM intent_rollups ORDER BY message_count DESC')
+            summary["intents"] = dict(cursor.fetchall())
+            
+            # Every response is either a knowledge base intent match or a web search
+            summary["web_search_count"] = summary["intents"].get("web_search", 0)
+            summary["intent_count"] = sum(summary["intents"].values()) - summary["web_search_count"]
+            
+            cursor.execute('SELECT bucket, message_count FROM latency_rollups')
+            latency_counts = dict(cursor.fetchall())
+            summary["latency"] = {label: latency_counts.get(label, 0) for _, label in self.LATENCY_BUCKETS}
+            
+            conn.close()
+            
+        except Exception as e:
+            print(f"Error getting analytics summary: {e}")
+        
+        return summary
 
 class DiscoveryAIGUI:
     def __init__(self, root):
@@ -294,6 +579,15 @@ class DiscoveryAIGUI:
                                command=self.send_message)
         send_button.pack(side=tk.RIGHT)
         
+        # Analytics button
+        analytics_button = tk.Button(input_frame,
+                                    text="Analytics 📊",
+                                    font=('Arial', 12, 'bold'),
+                                    bg='#3d3d3d',
+                                    fg='#ffffff',
+                                    command=self.show_analytics)
+        analytics_button.pack(side=tk.RIGHT, padx=(0, 10))
+        
         # Stats frame
         stats_frame = tk.Frame(main_frame, bg='#1e1e1e')
         stats_frame.pack(fill=tk.X, pady=5)
@@ -369,13 +663,15 @@ Type your first message to begin exploring! 🚀"""
         
         try:
             # Generate AI response
-            ai_response = self.ai_brain.generate_response(user_message)
+            start_time = time.time()
+            ai_response, intent = self.ai_brain.generate_response(user_message)
+            latency = time.time() - start_time
             
             # Learn from interaction
             self.ai_brain.learn_from_interaction(user_message, ai_response)
             
             # Save to database
-            self.db_manager.save_conversation(user_message, ai_response)
+            self.db_manager.save_conversation(user_message, ai_response, intent=intent, latency=latency)
             
             # Update display
             self.root.after(0, self.hide_typing_indicator)
@@ -406,6 +702,93 @@ Type your first message to begin exploring! 🚀"""
         """Update statistics display"""
         conv_count = len(self.ai_brain.conversation_history)
         self.stats_label.config(text=f"Conversations: {conv_count} | Learning: Active | Neural Network: Online")
+    
+    def show_analytics(self):
+        """Show conversation analytics charts (read from rollup tables only)"""
+        if getattr(self, 'analytics_window', None) is not None and self.analytics_window.winfo_exists():
+            self.analytics_window.lift()
+            self.refresh_analytics()
+            return
+        
+        self.analytics_window = tk.Toplevel(self.root)
+        self.analytics_window.title("Discovery AI March - Conversation Analytics")
+        self.analytics_window.geometry("900x650")
+        self.analytics_window.configure(bg='#1e1e1e')
+        
+        self.analytics_summary_label = tk.Label(self.analytics_window,
+                                               text="",
+                                               font=('Arial', 11),
+                                               fg='#cccccc',
+                                               bg='#1e1e1e')
+        self.analytics_summary_label.pack(pady=5)
+        
+        self.analytics_figure, self.analytics_axes = plt.subplots(2, 2, figsize=(9, 6))
+        self.analytics_figure.patch.set_facecolor('#1e1e1e')
+        self.analytics_canvas = FigureCanvasTkAgg(self.analytics_figure, master=self.analytics_window)
+        self.analytics_canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        
+        self.analytics_window.protocol("WM_DELETE_WINDOW", self.close_analytics)
+        self.refresh_analytics()
+    
+    def refresh_analytics(self):
+        """Redraw analytics charts and schedule the next live refresh"""
+        if getattr(self, 'analytics_window', None) is None or not self.analytics_window.winfo_exists():
+            return
+        
+        # Cancel any pending refresh so re-entry never starts a second loop
+        if getattr(self, 'analytics_refresh_id', None) is not None:
+            self.analytics_window.after_cancel(self.analytics_refresh_id)
+            self.analytics_refresh_id = None
+        
+        hourly = self.db_manager.get_usage_stats("hour", limit=24)
+        daily = self.db_manager.get_usage_stats("day", limit=14)
+        summary = self.db_manager.get_analytics_summary()
+        
+        self.analytics_summary_label.config(
+            text=f"Total messages: {summary['total_messages']} | "
+                 f"Users: {summary['active_users']} | "
+                 f"Since analytics enabled - Intent matches: {summary['intent_count']} | "
+                 f"Web searches: {summary['web_search_count']}")
+        
+        charts = [
+            ("Messages per hour", self.hour_labels([row[0] for row in hourly]), [row[1] for row in hourly]),
+            ("Messages per day", [row[0][5:] for row in daily], [row[1] for row in daily]),
+            ("Intent vs web search (since analytics enabled)", ["Intent", "Web search"], [summary["intent_count"], summary["web_search_count"]]),
+            ("Response latency (since analytics enabled)", list(summary["latency"].keys()), list(summary["latency"].values())),
+        ]
+        
+        for ax, (title, labels, values) in zip(self.analytics_axes.flat, charts):
+            ax.clear()
+            ax.set_facecolor('#2d2d2d')
+            ax.bar(range(len(values)), values, color='#00ff88')
+            ax.set_xticks(range(len(labels)))
+            ax.set_xticklabels(labels, rotation=45, ha='right', fontsize=8)
+            ax.set_title(title, color='#ffffff', fontsize=10)
+            ax.tick_params(colors='#cccccc')
+        
+        self.analytics_figure.tight_layout()
+        self.analytics_canvas.draw()
+        
+        self.analytics_refresh_id = self.analytics_window.after(5000, self.refresh_analytics)
+    
+    def hour_labels(self, bucket_starts):
+        """Label hour buckets as HH:00, showing the date at the start and at each midnight"""
+        labels = []
+        for i, bucket_start in enumerate(bucket_starts):
+            if i == 0 or bucket_start.endswith('T00:00'):
+                labels.append(bucket_start[5:].replace('T', ' '))
+            else:
+                labels.append(bucket_start[11:])
+        return labels
+    
+    def close_analytics(self):
+        """Close analytics window and stop live refresh"""
+        if getattr(self, 'analytics_refresh_id', None) is not None:
+            self.analytics_window.after_cancel(self.analytics_refresh_id)
+            self.analytics_refresh_id = None
+        plt.close(self.analytics_figure)
+        self.analytics_window.destroy()
+        self.analytics_window = None
 
 class TelegramBot:
     def __init__(self, token):
@@ -423,6 +806,7 @@ class TelegramBot:
         self.dispatcher.add_handler(CommandHandler("start", self.start_command))
         self.dispatcher.add_handler(CommandHandler("help", self.help_command))
         self.dispatcher.add_handler(CommandHandler("history", self.history_command))
+        self.dispatcher.add_handler(CommandHandler("stats", self.stats_command))
         self.dispatcher.add_handler(MessageHandler(Filters.text & ~Filters.command, self.handle_message))
     
     def start_command(self, update, context):
@@ -450,6 +834,7 @@ Available Commands:
 /start - Start conversation
 /help - Show this help message
 /history - Show recent conversations
+/stats - Show usage statistics
 
 Just type naturally and I'll:
 • Search the web for latest information
@@ -475,19 +860,40 @@ Try asking me about current events, technology, or any topic!"""
         
         update.message.reply_text(response)
     
+    def stats_command(self, update, context):
+        """Handle /stats command"""
+        user_id = str(update.effective_user.id)
+        user_counts = self.db_manager.get_user_message_count(user_id)
+        summary = self.db_manager.get_analytics_summary()
+        
+        response = "📊 Usage Statistics:\n\n"
+        response += f"Your messages: {user_counts['total_messages']}\n"
+        response += f"Your messages today: {user_counts['today_messages']}\n\n"
+        response += f"All messages: {summary['total_messages']}\n"
+        response += f"Users: {summary['active_users']}\n"
+        response += "Since analytics enabled:\n"
+        response += f"Intent matches: {summary['intent_count']} | Web searches: {summary['web_search_count']}\n"
+        response += "Response latency:\n"
+        for bucket, count in summary["latency"].items():
+            response += f"  {bucket}: {count}\n"
+        
+        update.message.reply_text(response)
+    
     def handle_message(self, update, context):
         """Handle regular messages"""
         user_message = update.message.text
         user_id = str(update.effective_user.id)
         
         # Generate AI response
-        ai_response = self.ai_brain.generate_response(user_message, user_id)
+        start_time = time.time()
+        ai_response, intent = self.ai_brain.generate_response(user_message, user_id)
+        latency = time.time() - start_time
         
         # Learn from interaction
         self.ai_brain.learn_from_interaction(user_message, ai_response, user_id)
         
         # Save to database
-        self.db_manager.save_conversation(user_message, ai_response, user_id)
+        self.db_manager.save_conversation(user_message, ai_response, user_id, intent=intent, latency=latency)
         
         # Send response
         update.message.reply_text(ai_response)
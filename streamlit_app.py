@@ -1,6 +1,7 @@
 import streamlit as st
 import pandas as pd
 import math
+import threading
 from pathlib import Path
 
 # Set the title and favicon that appear in the Browser's tab bar.
@@ -12,17 +13,29 @@ st.set_page_config(
 # -----------------------------------------------------------------------------
 # Declare some useful functions.
 
-@st.cache_data
-def get_gdp_data():
+DATA_FILENAME = Path(__file__).parent/'data/gdp_data.csv'
+
+def get_dataset_version():
+    """Identify the current version of the GDP data file.
+
+    Passed to both get_gdp_data and compute_gdp_view, so the loaded frame and
+    the cached views are invalidated together when the file changes on disk.
+    """
+    stat = DATA_FILENAME.stat()
+    return f'{stat.st_mtime_ns}-{stat.st_size}'
+
+@st.cache_data(max_entries=1)
+def get_gdp_data(dataset_version):
     """Grab GDP data from a CSV file.
 
-    This uses caching to avoid having to read the file every time. If we were
-    reading from an HTTP endpoint instead of a file, it's a good idea to set
-    a maximum age to the cache with the TTL argument: @st.cache_data(ttl='1d')
+    This uses caching to avoid having to read the file every time. The file
+    is re-read whenever dataset_version changes, and only the latest version
+    is kept in memory. If we were reading from an HTTP endpoint instead of a
+    file, it's a good idea to set a maximum age to the cache with the TTL
+    argument: @st.cache_data(ttl='1d')
     """
 
     # Instead of a CSV on disk, you could read from an HTTP endpoint here too.
-    DATA_FILENAME = Path(__file__).parent/'data/gdp_data.csv'
     raw_gdp_df = pd.read_csv(DATA_FILENAME)
 
     MIN_YEAR = 1960
@@ -57,7 +70,88 @@ def get_gdp_data():
 
     return gdp_df
 
-gdp_df = get_gdp_data()
+@st.cache_resource
+def get_view_cache_stats():
+    """Hit/miss counters for the view cache, shared across all sessions."""
+    return {'lock': threading.Lock(), 'requests': 0, 'misses': 0}
+
+@st.cache_data(max_entries=128)
+def compute_gdp_view(dataset_version, countries, from_year, to_year, _gdp_df):
+    """Compute everything the page draws for a given selection.
+
+    Keyed on (dataset_version, countries, from_year, to_year) only -- the
+    dataframe is prefixed with an underscore so Streamlit doesn't hash it on
+    every rerun. `countries` should be a sorted tuple so that the same set of
+    countries hits the same entry regardless of selection order. Old entries
+    are evicted once max_entries is reached, so popular presets (G7, BRICS,
+    last 20 years...) stay cached while one-off selections fall out.
+    """
+    stats = get_view_cache_stats()
+    with stats['lock']:
+        stats['misses'] += 1
+
+    # Filter the data
+    filtered_gdp_df = _gdp_df[
+        (_gdp_df['Country Code'].isin(countries))
+        & (_gdp_df['Year'] <= to_year)
+        & (from_year <= _gdp_df['Year'])
+    ]
+
+    first_year = filtered_gdp_df[filtered_gdp_df['Year'] == from_year]
+    last_year = filtered_gdp_df[filtered_gdp_df['Year'] == to_year]
+
+    metrics = {}
+
+    for country in countries:
+        first_gdp = first_year[first_year['Country Code'] == country]['GDP'].iat[0] / 1000000000
+        last_gdp = last_year[last_year['Country Code'] == country]['GDP'].iat[0] / 1000000000
+
+        if math.isnan(first_gdp):
+            growth = 'n/a'
+            delta_color = 'off'
+        else:
+            growth = f'{last_gdp / first_gdp:,.2f}x'
+            delta_color = 'normal'
+
+        metrics[country] = dict(
+            label=f'{country} GDP',
+            value=f'{last_gdp:,.0f}B',
+            delta=growth,
+            delta_color=delta_color
+        )
+
+    return {'chart': filtered_gdp_df, 'metrics': metrics}
+
+def get_view_cache_snapshot():
+    """Read the view cache counters consistently, under their lock."""
+    stats = get_view_cache_stats()
+    with stats['lock']:
+        requests, misses = stats['requests'], stats['misses']
+
+    hits = requests - misses
+    return {
+        'requests': requests,
+        'hits': hits,
+        'hit_rate': hits / requests if requests else 0.0,
+    }
+
+def get_gdp_view(dataset_version, gdp_df, selected_countries, from_year, to_year):
+    """Look up the derived view for a selection, recording cache hit-rate."""
+    stats = get_view_cache_stats()
+    with stats['lock']:
+        stats['requests'] += 1
+
+    return compute_gdp_view(
+        dataset_version,
+        tuple(sorted(set(selected_countries))),
+        from_year,
+        to_year,
+        gdp_df,
+    )
+
+# Computed once per rerun so the frame and the view cache agree on the version.
+dataset_version = get_dataset_version()
+gdp_df = get_gdp_data(dataset_version)
 
 # -----------------------------------------------------------------------------
 # Draw the actual page
@@ -98,19 +192,14 @@ selected_countries = st.multiselect(
 ''
 ''
 
-# Filter the data
-filtered_gdp_df = gdp_df[
-    (gdp_df['Country Code'].isin(selected_countries))
-    & (gdp_df['Year'] <= to_year)
-    & (from_year <= gdp_df['Year'])
-]
+gdp_view = get_gdp_view(dataset_version, gdp_df, selected_countries, from_year, to_year)
 
 st.header('GDP over time', divider='gray')
 
 ''
 
 st.line_chart(
-    filtered_gdp_df,
+    gdp_view['chart'],
     x='Year',
     y='GDP',
     color='Country Code',
@@ -120,9 +209,6 @@ st.line_chart(
 ''
 
 
-first_year = gdp_df[gdp_df['Year'] == from_year]
-last_year = gdp_df[gdp_df['Year'] == to_year]
-
 st.header(f'GDP in {to_year}', divider='gray')
 
 ''
@@ -133,19 +219,13 @@ for i, country in enumerate(selected_countries):
     col = cols[i % len(cols)]
 
     with col:
-        first_gdp = first_year[first_year['Country Code'] == country]['GDP'].iat[0] / 1000000000
-        last_gdp = last_year[last_year['Country Code'] == country]['GDP'].iat[0] / 1000000000
-
-        if math.isnan(first_gdp):
-            growth = 'n/a'
-            delta_color = 'off'
-        else:
-            growth = f'{last_gdp / first_gdp:,.2f}x'
-            delta_color = 'normal'
-
-        st.metric(
-            label=f'{country} GDP',
-            value=f'{last_gdp:,.0f}B',
-            delta=growth,
-            delta_color=delta_color
+        st.metric(**gdp_view['metrics'][country])
+
+# View cache metrics are for operators only: open the page with ?admin=1.
+if st.query_params.get('admin') == '1':
+    with st.expander('View cache stats'):
+        snapshot = get_view_cache_snapshot()
+        st.write(
+            f"{snapshot['hits']:,} hits / {snapshot['requests']:,} requests "
+            f"({snapshot['hit_rate']:.0%} hit rate)"
         )